@@ -1,12 +1,14 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Optional, List, Tuple
 
 from apps.ai.rag.chat import _load_system_prompt, _format_history
 from apps.ai.rag.ingest import get_rag_index
 from apps.ai.rag.llm_setup import configure_llamaindex
-from apps.ai.rag.utils import get_weather_data_for_place
+from apps.ai.rag.topics import build_routed_query_engine
+from apps.ai.rag.intents import detect_weather_intent, answer_weather
 from llama_index.core import PromptTemplate
 
 query_engine = None
@@ -21,8 +23,8 @@ async def lifespan(app: FastAPI):
     configure_llamaindex()
     
     print("Loading RAG index from storage...")
-    # build/load index
-    index = get_rag_index()
+    # build/load per-topic indexes
+    indexes = get_rag_index()
     print("RAG index loaded.")
     
     print("Creating RAG query engine...")
@@ -37,10 +39,10 @@ async def lifespan(app: FastAPI):
             "Answer:"
         )
     )
-    query_engine = index.as_query_engine(
-        streaming=False,
+    query_engine = build_routed_query_engine(
+        indexes,
+        text_qa_template,
         similarity_top_k=5,
-        text_qa_template=text_qa_template,
     )
     
     print("Startup complete. AI Engine is ready.")
@@ -53,12 +55,24 @@ app = FastAPI(lifespan=lifespan)
 
 class ChatRequest(BaseModel):
     query: str
+    # place from the previous weather answer, used when the query names none
+    last_place: Optional[str] = None
     
 @app.post("/api/chat")
 async def chat(request: ChatRequest):
     if not query_engine:
         return {"error": "Query engine is not initialized"}, 503
 
+    intent = detect_weather_intent(request.query, last_place=request.last_place)
+    if intent is not None:
+        try:
+            # forecast HTTP call + LLM summary block; keep them off the event loop
+            place, answer = await run_in_threadpool(answer_weather, intent)
+            return {"response": answer, "place": place}
+        except Exception as e:
+            print(f"[weather error] {e}")
+            # fall through to RAG
+
     try:
         response = query_engine.query(request.query)
         answer = getattr(response, 'response', str(response))
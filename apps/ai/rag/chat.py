@@ -12,14 +12,13 @@ from llama_index.core.llms import ChatMessage, MessageRole
 
 from .config import settings
 from .llm_setup import configure_llamaindex
-from .ingest import build_or_update_index
-from .utils import get_weather_data_for_place, format_weather_response
+from .ingest import build_or_update_indexes
+from .topics import build_routed_query_engine
+from .intents import WeatherIntent, detect_weather_intent, answer_weather
 from .utils import ensure_env_loaded
 
 ensure_env_loaded()
 
-import re
-
 
 SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.25"))  # env tunable
 HISTORY_MAX_TURNS = int(os.getenv("HISTORY_MAX_TURNS", "10"))  # how many prior turns to include for history
@@ -67,7 +66,7 @@ def _format_history(history: list[tuple[str, str]], max_turns: int) -> str:
     return "\n".join(lines)
 
 
-def interactive_chat(index: VectorStoreIndex) -> None:
+def interactive_chat(indexes: dict[str, VectorStoreIndex]) -> None:
     print("RAG Chat. Type 'exit' to quit.")
     system_prompt = _load_system_prompt()
     text_qa_template = PromptTemplate(
@@ -80,10 +79,10 @@ def interactive_chat(index: VectorStoreIndex) -> None:
             "Answer:"
         )
     )
-    query_engine = index.as_query_engine(
-        streaming=False,
+    query_engine = build_routed_query_engine(
+        indexes,
+        text_qa_template,
         similarity_top_k=TOP_K,
-        text_qa_template=text_qa_template,
     )
     history: list[tuple[str, str]] = []
     last_place: str | None = None
@@ -103,18 +102,7 @@ def interactive_chat(index: VectorStoreIndex) -> None:
             if place:
                 # fetch structured data, then ask LLM to summarize concisely
                 try:
-                    disp, wx = get_weather_data_for_place(place)
-                    llm = LlamaSettings.llm
-                    if llm is not None:
-                        prompt = (
-                            "Summarize this weather data in 3-6 concise sentences suitable for a tourist. Only return the summary, nothing else."
-                            "Include today’s conditions briefly, past conditions if relevant and a compact 7-day outlook with temps, rain risk, and wind.\n\n"
-                            f"Location: {disp}\n\nData (JSON):\n{wx}\n\nSummary:"
-                        )
-                        resp = llm.complete(prompt)
-                        msg = getattr(resp, 'text', str(resp))
-                    else:
-                        msg = format_weather_response(disp, wx)
+                    disp, msg = answer_weather(WeatherIntent(place=place))
                     print(msg)
                     last_place = disp
                     history.append((q, msg))
@@ -124,57 +112,10 @@ def interactive_chat(index: VectorStoreIndex) -> None:
                 # don't store command in history
                 continue
         # intent: weather queries (auto tool call)
-        low = q.lower()
-        if any(w in low for w in [
-            "weather", "forecast", "temperature", "temp", "rain", "raining", "climate",
-            "cold", "hot", "chilly", "warm", "heat", "humid", "humidity", "windy", "wind", "storm", "sunny",
-            "how hot", "how cold", "how warm", "how chilly",
-        ]):
-            # parse days (default to 7)
-            days = 7
-            m_days = re.search(r"next\s+(\d{1,2})\s+day", low) or re.search(r"(\d{1,2})-day", low) or re.search(r"for\s+(\d{1,2})\s+days", low)
-            if m_days:
-                try:
-                    days = max(1, min(14, int(m_days.group(1))))
-                except Exception:
-                    pass
-            elif "tomorrow" in low:
-                days = 2
-            elif "today" in low:
-                days = 1
-            elif "tonight" in low or "this evening" in low or "this morning" in low:
-                days = 1
-            elif "this week" in low or "next week" in low:
-                days = 7
-            elif "weekend" in low:
-                days = 3
-
-            # parse place: look for "in <place>" or "for <place>" phrases
-            place = None
-            m_in = re.search(r"\b(?:in|for)\s+([a-zA-Z ,.-]{2,})", q)
-            if m_in:
-                candidate = m_in.group(1).strip().rstrip("?.! ")
-                # trim trailing day qualifiers
-                candidate = re.sub(r"\b(next\s+\d+\s+days?|today|tomorrow)\b", "", candidate, flags=re.IGNORECASE).strip(", .-")
-                if candidate:
-                    place = candidate
-            # default to last mentioned place, else Dehradun
-            if not place:
-                place = last_place or "Dehradun"
-
+        intent = detect_weather_intent(q, last_place=last_place)
+        if intent is not None:
             try:
-                disp, wx = get_weather_data_for_place(place, days=days)
-                llm = LlamaSettings.llm
-                if llm is not None:
-                    prompt = (
-                        "Summarize this weather data in 3-6 concise sentences suitable for a tourist. "
-                        "Include today’s conditions briefly, past conditions if relevant and a compact 7-day outlook with temps, rain risk, and wind.\n\n"
-                        f"Location: {disp}\n\nData (JSON):\n{wx}\n\nSummary:"
-                    )
-                    resp = llm.complete(prompt)
-                    weather = getattr(resp, 'text', str(resp))
-                else:
-                    weather = format_weather_response(disp, wx)
+                disp, weather = answer_weather(intent)
                 print(weather)
                 last_place = disp
                 history.append((q, weather))
@@ -237,8 +178,8 @@ def interactive_chat(index: VectorStoreIndex) -> None:
 
 def main() -> None:
     configure_llamaindex()
-    index = build_or_update_index()
-    interactive_chat(index)
+    indexes = build_or_update_indexes()
+    interactive_chat(indexes)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 from pathlib import Path
 import json
@@ -62,5 +62,17 @@ class Settings:
     history_max_turns: int = int((_cfg.get("chat", {}) or {}).get("history_max_turns", 10))
     retry_on_timeouts: int = int((_cfg.get("chat", {}) or {}).get("retry_on_timeouts", 1))
 
+    # Weather summaries
+    weather_summary_cache_size: int = int((_cfg.get("weather", {}) or {}).get("summary_cache_size", 128))
+    weather_summary_cache_ttl: float = float((_cfg.get("weather", {}) or {}).get("summary_cache_ttl", 900))
+    weather_summary_timeout: float = float((_cfg.get("weather", {}) or {}).get("summary_timeout", 30))
+
+    # Topic partitions & query router
+    topic_default: str = (_cfg.get("topics", {}) or {}).get("default", "general")
+    topic_partitions: dict = field(default_factory=lambda: dict((_cfg.get("topics", {}) or {}).get("partitions", {}) or {}))
+    router_use_centroids: bool = bool(((_cfg.get("topics", {}) or {}).get("router", {}) or {}).get("use_centroids", True))
+    router_min_similarity: float = float(((_cfg.get("topics", {}) or {}).get("router", {}) or {}).get("min_similarity", 0.35))
+    router_min_margin: float = float(((_cfg.get("topics", {}) or {}).get("router", {}) or {}).get("min_margin", 0.05))
+
 
 settings = Settings()
@@ -0,0 +1,60 @@
+import difflib
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+GAZETTEER_FILE = Path(__file__).resolve().parent / "gazetteer.json"
+
+# trailing qualifiers people add to place names ("Kedarnath temple, Uttarakhand")
+_QUALIFIERS = {"uttarakhand", "uttrakhand", "uttarkhand", "india", "district", "town", "city", "temple", "dham"}
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    lat: float
+    lon: float
+    district: str = ""
+
+    @property
+    def display(self) -> str:
+        return f"{self.name}, Uttarakhand, India"
+
+
+def normalize_place(name: str) -> str:
+    words = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+    while len(words) > 1 and words[-1] in _QUALIFIERS:
+        words.pop()
+    return " ".join(words)
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer() -> dict[str, Place]:
+    """Map every normalized name and alias to its Place."""
+    try:
+        rows = json.loads(GAZETTEER_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    out: dict[str, Place] = {}
+    for row in rows:
+        place = Place(row["name"], float(row["lat"]), float(row["lon"]), row.get("district", ""))
+        for n in [row["name"], *(row.get("aliases") or [])]:
+            key = " ".join(re.sub(r"[^a-z0-9]+", " ", n.lower()).split())
+            if key:
+                out.setdefault(key, place)
+    return out
+
+
+def lookup_place(name: str, cutoff: float = 0.85) -> Place | None:
+    places = load_gazetteer()
+    key = normalize_place(name)
+    if not key:
+        return None
+    hit = places.get(key)
+    if hit is not None:
+        return hit
+    # fuzzy match for misspellings ("kedarnaath", "rishikesh city")
+    close = difflib.get_close_matches(key, list(places), n=1, cutoff=cutoff)
+    return places[close[0]] if close else None
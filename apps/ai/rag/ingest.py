@@ -14,10 +14,11 @@ ensure_env_loaded()
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import chromadb
-import re
+import numpy as np
 
 from .config import settings
 from .llm_setup import configure_llamaindex
+from .topics import collection_prefix, topic_for_file, load_centroids, save_centroids
 
 STATE_FILE = Path(__file__).resolve().parents[1] / "storage/.ingest_state.json"
 
@@ -30,7 +31,7 @@ def _hash_file(path: Path) -> str:
     return h.hexdigest()
 
 
-def _load_state() -> dict[str, str]:
+def _load_state() -> dict[str, dict[str, str]]:
     if STATE_FILE.exists():
         try:
             return json.loads(STATE_FILE.read_text())
@@ -39,7 +40,7 @@ def _load_state() -> dict[str, str]:
     return {}
 
 
-def _save_state(state: dict[str, str]) -> None:
+def _save_state(state: dict[str, dict[str, str]]) -> None:
     STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
     STATE_FILE.write_text(json.dumps(state, indent=2))
 
@@ -57,7 +58,15 @@ def discover_files(data_dir: str) -> list[Path]:
     return sorted(paths)
 
 
-def build_or_update_index() -> VectorStoreIndex:
+def _collection_centroid(collection) -> list[float]:
+    got = collection.get(include=["embeddings"])
+    embeddings = got.get("embeddings") if got else None
+    if embeddings is None or len(embeddings) == 0:
+        return []
+    return np.asarray(embeddings, dtype=float).mean(axis=0).tolist()
+
+
+def build_or_update_indexes() -> dict[str, VectorStoreIndex]:
     configure_llamaindex()
 
     # chroma client + persistent storage
@@ -65,70 +74,101 @@ def build_or_update_index() -> VectorStoreIndex:
     persist_dir = str((base / settings.chroma_path).resolve())
     os.makedirs(persist_dir, exist_ok=True)
     chroma_client = chromadb.PersistentClient(path=persist_dir)
+    prefix = collection_prefix()
 
-    # distinct collection name keyed ONLY by embedding provider+model
-    if settings.embed_provider == "ollama":
-        embed_tag = settings.ollama_embed_model
-        embed_prefix = "ollama"
-    else:
-        embed_tag = settings.openai_embed_model
-        embed_prefix = "openai"
-    safe_tag = re.sub(r"[^a-zA-Z0-9_.-]+", "-", embed_tag).lower()
-    collection_name = f"{settings.index_name}-{embed_prefix}-{safe_tag}"
-
-    collection = chroma_client.get_or_create_collection(collection_name)
-    print(f"[ingest] Using Chroma collection: {collection_name}")
-    vector_store = ChromaVectorStore(chroma_collection=collection)
-
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
-
-    # only re-load changed files
+    # partition files by topic (config.yaml topics.partitions)
+    data_root = (base / settings.data_dir).resolve()
     paths = discover_files(settings.data_dir)
-    prev = _load_state()
-    # determine which files changed
-    changed: list[Path] = []
-    new_state: dict[str, str] = {}
-
+    by_topic: dict[str, list[Path]] = {}
     for p in paths:
-        digest = _hash_file(p)
-        new_state[str(p)] = digest
-        if prev.get(str(p)) != digest:
-            changed.append(p)
-
-    need_full_rebuild = changed or set(prev.keys()) - {str(p) for p in paths} or (collection.count() == 0)
-    if need_full_rebuild:
-        # If changes or deletions, rebuild from all docs for simplicity & correctness
-        print(f"[ingest] Rebuilding index from {len(paths)} files...")
-        reader = SimpleDirectoryReader(input_files=paths)
-        docs = reader.load_data(show_progress=True, num_workers=4)
-        # This will lose history, but is required for correctness
-        # Re-create collection
-        chroma_client.delete_collection(collection_name)
+        by_topic.setdefault(topic_for_file(p, data_root), []).append(p)
+
+    # only re-load partitions whose files changed, moved topic or were deleted
+    prev = _load_state()
+    new_state: dict[str, dict[str, str]] = {}
+    stale: set[str] = set()
+    for topic, files in by_topic.items():
+        for p in files:
+            entry = {"topic": topic, "digest": _hash_file(p)}
+            new_state[str(p)] = entry
+            old = prev.get(str(p))
+            if old != entry:
+                stale.add(topic)
+                # a file that moved topic must also leave its old partition
+                if isinstance(old, dict) and old.get("topic") and old["topic"] != topic:
+                    stale.add(old["topic"])
+    for key, entry in prev.items():
+        if key not in new_state and isinstance(entry, dict) and entry.get("topic"):
+            stale.add(entry["topic"])
+
+    centroids = load_centroids()
+    indexes: dict[str, VectorStoreIndex] = {}
+    for topic, files in sorted(by_topic.items()):
+        collection_name = f"{prefix}-{topic}"
         collection = chroma_client.get_or_create_collection(collection_name)
-        vector_store = ChromaVectorStore(chroma_collection=collection)
-        storage_context = StorageContext.from_defaults(vector_store=vector_store)
-        index = VectorStoreIndex.from_documents(
-            docs,
-            storage_context=storage_context,
-            show_progress=True,
-        )
-        _save_state(new_state)
-        print("[ingest] Index rebuild complete.")
-    else:
-        print("[ingest] No file changes detected, loading existing index.")
-        index = VectorStoreIndex.from_vector_store(
-            vector_store,
-            storage_context=storage_context,
-        )
+        print(f"[ingest] Using Chroma collection: {collection_name}")
+
+        if topic in stale or collection.count() == 0:
+            # rebuild the whole partition for simplicity & correctness
+            print(f"[ingest] Rebuilding '{topic}' partition from {len(files)} files...")
+            reader = SimpleDirectoryReader(input_files=files)
+            docs = reader.load_data(show_progress=True, num_workers=4)
+            for doc in docs:
+                doc.metadata["topic"] = topic
+                doc.excluded_embed_metadata_keys.append("topic")
+                doc.excluded_llm_metadata_keys.append("topic")
+            chroma_client.delete_collection(collection_name)
+            collection = chroma_client.get_or_create_collection(collection_name)
+            vector_store = ChromaVectorStore(chroma_collection=collection)
+            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            index = VectorStoreIndex.from_documents(
+                docs,
+                storage_context=storage_context,
+                show_progress=True,
+            )
+            centroids[collection_name] = _collection_centroid(collection)
+            print(f"[ingest] '{topic}' partition rebuild complete.")
+        else:
+            print(f"[ingest] No file changes in '{topic}', loading existing partition.")
+            vector_store = ChromaVectorStore(chroma_collection=collection)
+            storage_context = StorageContext.from_defaults(vector_store=vector_store)
+            index = VectorStoreIndex.from_vector_store(
+                vector_store,
+                storage_context=storage_context,
+            )
+            if not centroids.get(collection_name):
+                centroids[collection_name] = _collection_centroid(collection)
+        indexes[topic] = index
+
+    # state from before topic partitions is a flat {path: digest} map; its single
+    # collection duplicates the whole corpus, so drop it
+    if any(not isinstance(entry, dict) for entry in prev.values()):
+        try:
+            chroma_client.delete_collection(prefix)
+            print(f"[ingest] Removed legacy collection: {prefix}")
+        except Exception:
+            pass
+
+    # drop partitions that no longer have any files
+    for topic in stale - by_topic.keys():
+        centroids.pop(f"{prefix}-{topic}", None)
+        try:
+            chroma_client.delete_collection(f"{prefix}-{topic}")
+            print(f"[ingest] Removed empty partition: {topic}")
+        except Exception:
+            pass
 
-    return index
+    # centroids of other embedding models stay, so switching back needs no rebuild
+    save_centroids(centroids)
+    _save_state(new_state)
+    return indexes
 
 
-get_rag_index = build_or_update_index
+get_rag_index = build_or_update_indexes
 
 
 def main() -> None:
-    build_or_update_index()
+    build_or_update_indexes()
 
 
 if __name__ == "__main__":
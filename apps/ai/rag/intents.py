@@ -0,0 +1,280 @@
+import hashlib
+import json
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from typing import Any
+
+from cachetools import TTLCache
+from llama_index.core import Settings as LlamaSettings
+
+from .config import settings
+from .gazetteer import Place, load_gazetteer, lookup_place
+from .utils import get_forecast, get_weather_data_for_place, format_weather_response
+
+# whole-word matches, so inflected forms are listed explicitly ("temp" must not match "temple")
+WEATHER_KEYWORDS = [
+    "weather", "forecast", "forecasts", "temperature", "temperatures", "temp", "temps",
+    "rain", "rains", "rainy", "raining", "rainfall", "climate", "cold", "hot", "chilly", "warm", "heat",
+    "humid", "humidity", "windy", "wind", "winds", "storm", "storms", "stormy",
+    "snow", "snowing", "snowy", "snowfall", "sunny", "how hot", "how cold", "how warm", "how chilly",
+]
+
+# checked in this order; the first phrase present decides the day range
+DAY_PHRASES: list[tuple[str, int]] = [
+    ("tomorrow", 2),
+    ("today", 1),
+    ("tonight", 1),
+    ("this evening", 1),
+    ("this morning", 1),
+    ("this week", 7),
+    ("next week", 7),
+    ("weekend", 3),
+]
+
+DEFAULT_DAYS = 7
+
+_DAYS_RE = re.compile(r"next\s+(\d{1,2})\s+day|(\d{1,2})-day|for\s+(\d{1,2})\s+days")
+# lookahead so overlapping phrases ("in Kedarnath in the evening") are all seen
+_PLACE_RE = re.compile(r"\b(?:in|for)\s+(?=([a-zA-Z ,.-]{2,}))")
+_ORIGIN_RE = re.compile(r"\b(?:from|via)\s+$", re.IGNORECASE)
+_PLACE_ARTICLE_RE = re.compile(r"^(?:the|a|an)\s+", re.IGNORECASE)
+_PLACE_TRIM_RE = re.compile(
+    r"(?:^|\s)(?:for|in|at|next|this|over|during|today|tomorrow|tonight|weekend|week|days?"
+    r"|(?:the\s+)?(?:evening|morning|afternoon|night)"
+    r"|january|february|march|april|may|june|july|august|september|october|november|december)\b.*$",
+    re.IGNORECASE,
+)
+_PLACE_SPLIT_RE = re.compile(r"\s+(?:and|or|vs\.?|versus)\s+|\s*&\s*", re.IGNORECASE)
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over whole-word phrases.
+
+    All phrases are found in a single pass over the text, however many
+    there are. Matches must start and end on a word boundary.
+    """
+
+    def __init__(self, phrases: dict[str, Any]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, Any]]] = [[]]
+        for phrase, payload in phrases.items():
+            self._add(phrase.lower(), payload)
+        self._build()
+
+    def _add(self, phrase: str, payload: Any) -> None:
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(phrase), payload))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0) if state else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> list[tuple[int, int, Any]]:
+        """Return (start, end, payload) for every whole-word match, in text order."""
+        low = text.lower()
+        hits: list[tuple[int, int, Any]] = []
+        state = 0
+        for i, ch in enumerate(low):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            end = i + 1
+            for length, payload in self._out[state]:
+                start = end - length
+                if (start == 0 or not low[start - 1].isalnum()) and (end == len(low) or not low[end].isalnum()):
+                    hits.append((start, end, payload))
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        return hits
+
+
+def _build_matcher() -> PhraseMatcher:
+    phrases: dict[str, Any] = {}
+    for key, place in load_gazetteer().items():
+        phrases[key] = ("place", place)
+    for phrase, days in DAY_PHRASES:
+        phrases[phrase] = ("days", phrase)
+    for w in WEATHER_KEYWORDS:
+        phrases[w] = ("weather", w)
+    return PhraseMatcher(phrases)
+
+
+_matcher: PhraseMatcher | None = None
+
+
+def get_matcher() -> PhraseMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = _build_matcher()
+    return _matcher
+
+
+@dataclass
+class WeatherIntent:
+    place: str
+    days: int = DEFAULT_DAYS
+    known_place: Place | None = None
+
+
+def detect_weather_intent(query: str, last_place: str | None = None, default_place: str = "Dehradun") -> WeatherIntent | None:
+    """Return a WeatherIntent if the query asks about weather, else None."""
+    hits = get_matcher().find_all(query)
+    if not any(kind == "weather" for _, _, (kind, _) in hits):
+        return None
+
+    # parse days (default to 7)
+    days = DEFAULT_DAYS
+    low = query.lower()
+    m_days = _DAYS_RE.search(low)
+    if m_days:
+        days = max(1, min(14, int(next(g for g in m_days.groups() if g))))
+    else:
+        found = {payload for _, _, (kind, payload) in hits if kind == "days"}
+        if found:
+            days = next(d for phrase, d in DAY_PHRASES if phrase in found)
+
+    # parse place: every "in <place>" / "for <place>" phrase is tried against
+    # the gazetteer as a whole; then a known place elsewhere in the query; the
+    # raw phrase (for the network geocoder) only if neither resolves
+    candidates: list[tuple[int, int, str]] = []
+    for m_in in _PLACE_RE.finditer(query):
+        raw = m_in.group(1)
+        candidate = _PLACE_ARTICLE_RE.sub("", raw.strip()).rstrip("?.! ")
+        # trim trailing qualifiers ("Shimla for 5 days", "Kedarnath in the evening")
+        candidate = _PLACE_TRIM_RE.sub("", candidate).strip(", .-")
+        phrase = candidate
+        # several places ("Manali and Mussoorie"): answer for the first
+        candidate = _PLACE_SPLIT_RE.split(candidate, maxsplit=1)[0].strip(", .-")
+        if not candidate:
+            continue
+        known = lookup_place(candidate)
+        if known is not None:
+            return WeatherIntent(place=known.display, days=days, known_place=known)
+        start = m_in.start(1) + max(0, raw.lower().find(phrase.lower()))
+        candidates.append((start, start + len(phrase), candidate))
+    # a place hit inside an unresolved phrase is a partial match ("Kedar Kantha")
+    # or a later alternative ("Manali and Mussoorie"); after "from" it's the origin
+    places = [
+        payload for h_start, h_end, (kind, payload) in hits
+        if kind == "place"
+        and not _ORIGIN_RE.search(query, 0, h_start)
+        and not any(c_start <= h_start and h_end <= c_end for c_start, c_end, _ in candidates)
+    ]
+    if places:
+        return WeatherIntent(place=places[0].display, days=days, known_place=places[0])
+    if candidates:
+        return WeatherIntent(place=candidates[0][2], days=days)
+    # default to last mentioned place, else Dehradun
+    return WeatherIntent(place=last_place or default_place, days=days)
+
+
+def get_weather_data_for_intent(intent: WeatherIntent) -> tuple[str, dict[str, object]]:
+    if intent.known_place is not None:
+        p = intent.known_place
+        return p.display, get_forecast(p.lat, p.lon, intent.days)
+    return get_weather_data_for_place(intent.place, days=intent.days)
+
+
+# per-request fields that change without the forecast changing
+_VOLATILE_KEYS = {"generationtime_ms"}
+
+_summary_cache: TTLCache = TTLCache(maxsize=settings.weather_summary_cache_size, ttl=settings.weather_summary_cache_ttl)
+_summary_inflight: dict[str, Future] = {}
+_summary_lock = threading.Lock()
+
+
+def forecast_key(disp: str, wx: dict[str, object], days: int) -> str:
+    """Hash of the normalized forecast payload and day range."""
+    payload = {k: v for k, v in wx.items() if k not in _VOLATILE_KEYS}
+    blob = json.dumps({"place": disp, "days": days, "data": payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _complete_text(llm, prompt: str) -> str:
+    resp = llm.complete(prompt)
+    return getattr(resp, 'text', str(resp))
+
+
+def _store_summary(key: str, fut: Future) -> None:
+    with _summary_lock:
+        _summary_inflight.pop(key, None)
+        if not fut.cancelled() and fut.exception() is None:
+            _summary_cache[key] = fut.result()
+
+
+def _start_summary(key: str, llm, prompt: str) -> Future:
+    # one daemon thread per distinct forecast: no queueing eats into the
+    # caller's timeout, and an abandoned llm.complete can't block exit
+    fut: Future = Future()
+
+    def run() -> None:
+        if not fut.set_running_or_notify_cancel():
+            return
+        try:
+            fut.set_result(_complete_text(llm, prompt))
+        except Exception as e:
+            fut.set_exception(e)
+
+    fut.add_done_callback(lambda f: _store_summary(key, f))
+    threading.Thread(target=run, name="weather-summary", daemon=True).start()
+    return fut
+
+
+def summarize_weather(disp: str, wx: dict[str, object], days: int = DEFAULT_DAYS) -> str:
+    """LLM summary of a forecast, cached by forecast content.
+
+    Identical forecasts share one LLM call, including concurrent requests.
+    If the LLM fails or takes longer than weather.summary_timeout, the plain
+    format_weather_response text is returned; a late summary still lands in
+    the cache for the next caller.
+    """
+    llm = LlamaSettings.llm
+    if llm is None:
+        return format_weather_response(disp, wx)
+    key = forecast_key(disp, wx, days)
+    with _summary_lock:
+        cached = _summary_cache.get(key)
+        if cached is not None:
+            return cached
+        fut = _summary_inflight.get(key)
+        if fut is None:
+            prompt = (
+                "Summarize this weather data in 3-6 concise sentences suitable for a tourist. Only return the summary, nothing else. "
+                "Include today’s conditions briefly, past conditions if relevant and a compact 7-day outlook with temps, rain risk, and wind.\n\n"
+                f"Location: {disp}\n\nData (JSON):\n{wx}\n\nSummary:"
+            )
+            fut = _start_summary(key, llm, prompt)
+            _summary_inflight[key] = fut
+    try:
+        return fut.result(timeout=settings.weather_summary_timeout or None)
+    except FuturesTimeout:
+        print(f"[weather] summary for {disp} is slow, answering with the plain forecast")
+    except Exception as e:
+        print(f"[weather] summary failed ({e}), answering with the plain forecast")
+    return format_weather_response(disp, wx)
+
+
+def answer_weather(intent: WeatherIntent) -> tuple[str, str]:
+    """Fetch the forecast and summarize it; returns (display name, answer)."""
+    disp, wx = get_weather_data_for_intent(intent)
+    return disp, summarize_weather(disp, wx, intent.days)
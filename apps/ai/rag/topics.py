@@ -0,0 +1,189 @@
+import json
+import math
+import re
+from fnmatch import fnmatch
+from pathlib import Path
+
+from llama_index.core import VectorStoreIndex, Settings as LlamaSettings, PromptTemplate
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeWithScore, QueryBundle
+
+from .config import settings
+
+CENTROIDS_FILE = Path(__file__).resolve().parents[1] / "storage/.topic_centroids.json"
+
+# chat prepends history to the query; only the user's own question is routed
+_QUESTION_MARKER = "User question:"
+
+
+def safe_topic(name: str) -> str:
+    return re.sub(r"[^a-z0-9_-]+", "-", str(name).lower()).strip("-") or "general"
+
+
+def collection_prefix() -> str:
+    # distinct collection names keyed ONLY by embedding provider+model
+    if settings.embed_provider == "ollama":
+        embed_tag = settings.ollama_embed_model
+        embed_prefix = "ollama"
+    else:
+        embed_tag = settings.openai_embed_model
+        embed_prefix = "openai"
+    safe_tag = re.sub(r"[^a-zA-Z0-9_.-]+", "-", embed_tag).lower()
+    return f"{settings.index_name}-{embed_prefix}-{safe_tag}"
+
+
+def topic_for_file(path: Path, data_root: Path) -> str:
+    # first partition (in config order) with a matching file pattern wins
+    try:
+        rel = path.resolve().relative_to(data_root.resolve()).as_posix()
+    except ValueError:
+        rel = path.name
+    for topic, spec in settings.topic_partitions.items():
+        for pattern in (spec or {}).get("files") or []:
+            if fnmatch(rel, pattern) or fnmatch(path.name, pattern):
+                return safe_topic(topic)
+    return safe_topic(settings.topic_default)
+
+
+def load_centroids() -> dict[str, list[float]]:
+    """Partition centroids keyed by Chroma collection name."""
+    if CENTROIDS_FILE.exists():
+        try:
+            return json.loads(CENTROIDS_FILE.read_text())
+        except Exception:
+            return {}
+    return {}
+
+
+def save_centroids(centroids: dict[str, list[float]]) -> None:
+    CENTROIDS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CENTROIDS_FILE.write_text(json.dumps(centroids))
+
+
+def _cosine(a: list[float], b: list[float]) -> float | None:
+    # vectors from different embedding models can't be compared
+    if len(a) != len(b):
+        return None
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+class TopicRouter:
+    """Pick the partitions worth searching for a query.
+
+    Keyword rules from config.yaml are tried first; if none match, the query
+    embedding is compared against each partition's centroid. Anything short
+    of a confident answer routes to every partition.
+    """
+
+    def __init__(
+        self,
+        topics: list[str],
+        keywords: dict[str, list[str]] | None = None,
+        centroids: dict[str, list[float]] | None = None,
+        min_similarity: float = 0.35,
+        min_margin: float = 0.05,
+    ) -> None:
+        self.topics = list(topics)
+        self.centroids = {t: c for t, c in (centroids or {}).items() if t in self.topics and c}
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._patterns: dict[str, re.Pattern[str]] = {}
+        for topic, words in (keywords or {}).items():
+            words = [w for w in words if w]
+            if topic in self.topics and words:
+                alt = "|".join(re.escape(w.lower()) for w in sorted(words, key=len, reverse=True))
+                self._patterns[topic] = re.compile(rf"\b(?:{alt})\b")
+
+    @property
+    def needs_embedding(self) -> bool:
+        return len(self.centroids) > 1
+
+    def route_by_rules(self, query: str) -> list[str]:
+        low = query.lower()
+        return [t for t, pat in self._patterns.items() if pat.search(low)]
+
+    def route_by_centroid(self, embedding: list[float]) -> list[str]:
+        scores = [(_cosine(embedding, c), t) for t, c in self.centroids.items()]
+        if not scores or any(score is None for score, _ in scores):
+            # centroids from another embedding model: not a confident answer
+            return []
+        scored = sorted(scores, reverse=True)
+        best_score, best = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else -1.0
+        if best_score < self.min_similarity or best_score - runner_up < self.min_margin:
+            return []
+        return [best]
+
+    def route(self, query: str, embedding: list[float] | None = None) -> list[str]:
+        if len(self.topics) <= 1:
+            return list(self.topics)
+        hits = self.route_by_rules(query)
+        if not hits and embedding is not None:
+            hits = self.route_by_centroid(embedding)
+        return hits or list(self.topics)
+
+
+def build_topic_router(topics: list[str]) -> TopicRouter:
+    keywords = {
+        safe_topic(t): list((spec or {}).get("keywords") or [])
+        for t, spec in settings.topic_partitions.items()
+    }
+    centroids: dict[str, list[float]] = {}
+    if settings.router_use_centroids:
+        stored = load_centroids()
+        prefix = collection_prefix()
+        centroids = {t: stored[f"{prefix}-{t}"] for t in topics if stored.get(f"{prefix}-{t}")}
+    return TopicRouter(
+        topics,
+        keywords=keywords,
+        centroids=centroids,
+        min_similarity=settings.router_min_similarity,
+        min_margin=settings.router_min_margin,
+    )
+
+
+class TopicRoutedRetriever(BaseRetriever):
+    """Retrieve only from the partitions the router selects, then merge by score."""
+
+    def __init__(self, indexes: dict[str, VectorStoreIndex], router: TopicRouter, similarity_top_k: int = 5) -> None:
+        super().__init__()
+        self._retrievers = {t: idx.as_retriever(similarity_top_k=similarity_top_k) for t, idx in indexes.items()}
+        self._router = router
+        self._top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        question = query_bundle.query_str.rpartition(_QUESTION_MARKER)[2].strip() or query_bundle.query_str
+        topics = self._router.route_by_rules(question) if len(self._retrievers) > 1 else []
+        if not topics and self._router.needs_embedding:
+            # route on the question alone so earlier turns don't pick the partition
+            if question == query_bundle.query_str:
+                # no history: embed once here; the per-partition retrievers reuse it
+                if query_bundle.embedding is None:
+                    query_bundle.embedding = LlamaSettings.embed_model.get_agg_embedding_from_queries(
+                        query_bundle.embedding_strs
+                    )
+                route_embedding = query_bundle.embedding
+            else:
+                route_embedding = LlamaSettings.embed_model.get_query_embedding(question)
+            topics = self._router.route(question, route_embedding)
+        topics = [t for t in topics if t in self._retrievers] or list(self._retrievers)
+
+        nodes: list[NodeWithScore] = []
+        for t in topics:
+            nodes.extend(self._retrievers[t].retrieve(query_bundle))
+        nodes.sort(key=lambda n: n.score or 0.0, reverse=True)
+        return nodes[: self._top_k]
+
+
+def build_routed_query_engine(
+    indexes: dict[str, VectorStoreIndex],
+    text_qa_template: PromptTemplate,
+    similarity_top_k: int = 5,
+) -> RetrieverQueryEngine:
+    router = build_topic_router(list(indexes))
+    retriever = TopicRoutedRetriever(indexes, router, similarity_top_k=similarity_top_k)
+    return RetrieverQueryEngine.from_args(retriever, text_qa_template=text_qa_template)
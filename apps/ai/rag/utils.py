@@ -5,6 +5,8 @@ import re
 from datetime import date
 import requests
 
+from .gazetteer import lookup_place
+
 _loaded = False
 
 def ensure_env_loaded() -> None:
@@ -30,15 +32,19 @@ DEFAULT_CAPITAL_LON = float(os.getenv("WEATHER_DEFAULT_CAPITAL_LON", "78.0322"))
 
 
 def geocode_place(name: str) -> tuple[float, float, str] | None:
+    # known Uttarakhand places resolve from the bundled gazetteer, no network call
+    norm = re.sub(r"[^a-z]", "", name.lower())
+    if norm in {"uttarakhand", "uttrakhand", "uttarkhand"}:
+        return DEFAULT_CAPITAL_LAT, DEFAULT_CAPITAL_LON, DEFAULT_CAPITAL_NAME
+    known = lookup_place(name)
+    if known is not None:
+        return known.lat, known.lon, known.display
     params = {"name": name, "count": 1, "language": "en", "format": "json"}
     r = requests.get(OPEN_METEO_GEOCODE_URL, params=params, timeout=HTTP_TIMEOUT)
     r.raise_for_status()
     data = r.json() or {}
     results = data.get("results") or []
     if not results:
-        norm = re.sub(r"[^a-z]", "", name.lower())
-        if norm in {"uttarakhand", "uttrakhand", "uttarkhand"}:
-            return DEFAULT_CAPITAL_LAT, DEFAULT_CAPITAL_LON, DEFAULT_CAPITAL_NAME
         return None
     hit = results[0]
     lat = float(hit.get("latitude"))